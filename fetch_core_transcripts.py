@@ -13,10 +13,19 @@ Usage:
 from __future__ import annotations
 
 import argparse
-from typing import List
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, TextIO
 
+import diskcache
 import pandas as pd
-from tqdm import tqdm
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from aiolimiter import AsyncLimiter
+from tqdm.asyncio import tqdm
 from youtube_transcript_api import (
     NoTranscriptFound,
     TranscriptsDisabled,
@@ -25,6 +34,78 @@ from youtube_transcript_api import (
 )
 
 LANGS: List[str] = ["en", "en-US", "en-GB"]
+# Max number of videos whose transcripts are being fetched at once
+CONCURRENCY = 20
+# Client-side cap on videos started per second (YouTube blocks IPs that scrape too fast).
+# Each video costs ~3 HTTP requests (watch page, transcript list, timedtext) and the
+# generated-track fallback repeats the last two, so 1 video/s is ~3-5 requests/s.
+VIDEOS_PER_SECOND = 1
+# Strings read as missing, same as pandas' read_csv defaults
+NA_VALUES: List[str] = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+# On-disk cache of fetched transcripts, shared across runs (transcripts never expire)
+CACHE = diskcache.Cache(".yt_cache")
+# One transcript client per executor thread
+_THREAD_LOCAL = threading.local()
+
+
+def _thread_api() -> YouTubeTranscriptApi:
+    """
+    Per-thread transcript client.
+
+    YouTubeTranscriptApi is not thread-safe (it also stores consent cookies in its
+    session), so each worker thread builds one and reuses its keep-alive session.
+    """
+    api = getattr(_THREAD_LOCAL, "api", None)
+    if api is None:
+        api = _THREAD_LOCAL.api = YouTubeTranscriptApi()
+    return api
+
+
+def _pandas_column_names(names: List[str]) -> List[str]:
+    """Label blank and duplicate headers the way pandas' CSV readers do ("Unnamed: 2", "n.1")."""
+    labels = [name if name else f"Unnamed: {i}" for i, name in enumerate(names)]
+    counts: Dict[str, int] = {}
+    result: List[str] = []
+    for label in labels:
+        count = counts.get(label, 0)
+        while count > 0:
+            counts[label] = count + 1
+            label = f"{label}.{count}"
+            count = counts.get(label, 0)
+        counts[label] = count + 1
+        result.append(label)
+    return result
+
+
+def read_numbers_csv_pyarrow(path: str) -> pd.DataFrame:
+    """
+    Read a Numbers CSV (';'-separated, sheet name on line 1) with the pyarrow parser.
+
+    Every column is declared as string so values pass through exactly as exported
+    (no timestamp or number inference), and missing values match pandas' defaults.
+    The sheet-name line is assumed to be a single physical line.
+    """
+    read_options = pa_csv.ReadOptions(skip_rows=1)
+    parse_options = pa_csv.ParseOptions(delimiter=";", newlines_in_values=True)
+    # Header names as pyarrow parses them (handles quoted newlines inside header cells)
+    with pa_csv.open_csv(path, read_options=read_options, parse_options=parse_options) as reader:
+        names = reader.schema.names
+    table = pa_csv.read_csv(
+        path,
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    df = table.to_pandas()
+    df.columns = _pandas_column_names(names)
+    return df
 
 
 def load_core_csv(path: str) -> pd.DataFrame:
@@ -32,11 +113,16 @@ def load_core_csv(path: str) -> pd.DataFrame:
     Load CSV exported from Numbers.
 
     Numbers often uses ';' as delimiter and puts the sheet name on the first line.
+    The multi-threaded pyarrow parser is tried first; the python parser is the
+    fallback for files pyarrow rejects.
     """
     try:
-        df = pd.read_csv(path, sep=";", dtype=str, engine="python", skiprows=1)
+        df = read_numbers_csv_pyarrow(path)
     except Exception:
-        df = pd.read_csv(path, dtype=str)
+        try:
+            df = pd.read_csv(path, sep=";", dtype=str, engine="python", skiprows=1)
+        except Exception:
+            df = pd.read_csv(path, dtype=str)
 
     # Drop completely empty columns (e.g., trailing delimiter)
     df = df.dropna(axis=1, how="all")
@@ -45,18 +131,27 @@ def load_core_csv(path: str) -> pd.DataFrame:
     return df
 
 
-def get_transcript(video_id: str) -> str:
+def join_text(fetched) -> str:
+    """Join transcript cues into one string."""
+    try:
+        # Snippets from youtube_transcript_api always carry .text; skip the per-cue getattr default
+        return " ".join(entry.text for entry in fetched).strip()
+    except AttributeError:
+        return " ".join(getattr(entry, "text", "") for entry in fetched).strip()
+
+
+def fetch_transcript_sync(video_id: str, api: Optional[YouTubeTranscriptApi] = None) -> str:
     """Fetch transcript text; return empty string if unavailable."""
-    api = YouTubeTranscriptApi()
+    api = api or _thread_api()
     try:
         fetched = api.fetch(video_id, languages=LANGS)
-        return " ".join(getattr(entry, "text", "") for entry in fetched).strip()
+        return join_text(fetched)
     except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable):
         # Fall back to generated transcripts if available
         try:
             transcripts = api.list(video_id)
             gen = transcripts.find_generated_transcript(LANGS)
-            return " ".join(getattr(entry, "text", "") for entry in gen.fetch()).strip()
+            return join_text(gen.fetch())
         except Exception:
             return ""
     except Exception:
@@ -64,34 +159,146 @@ def get_transcript(video_id: str) -> str:
         return ""
 
 
+async def get_transcript(
+    executor: ThreadPoolExecutor, sem: asyncio.Semaphore, limiter: AsyncLimiter, video_id: str
+) -> str:
+    """
+    Fetch one transcript without blocking the event loop.
+
+    youtube_transcript_api is synchronous, so the call runs in a worker thread;
+    the semaphore caps how many videos are in flight at once and the limiter
+    caps how many videos start per second. Non-empty transcripts are served from CACHE
+    when available; empty results are not cached so they are retried next run.
+    """
+    key = (video_id, "transcript")
+    cached = CACHE.get(key)
+    if cached is not None:
+        return cached
+    async with sem, limiter:
+        loop = asyncio.get_running_loop()
+        text = await loop.run_in_executor(executor, fetch_transcript_sync, video_id)
+    if text:
+        CACHE.set(key, text, tag="transcript")
+    return text
+
+
+async def fetch_and_record(
+    executor: ThreadPoolExecutor, sem: asyncio.Semaphore, limiter: AsyncLimiter, out: TextIO, video_id: str
+) -> None:
+    """Fetch one transcript and append it to the JSONL progress file right away."""
+    text = await get_transcript(executor, sem, limiter, video_id)
+    out.write(json.dumps({"video_id": video_id, "transcript": text}, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+async def fetch_transcripts(video_ids: List[str], progress_path: str, concurrency: int = CONCURRENCY) -> None:
+    """Fetch transcripts concurrently, streaming each result to progress_path as it completes."""
+    # Created per run so the limiter is bound to the running event loop
+    sem = asyncio.Semaphore(concurrency)
+    limiter = AsyncLimiter(max_rate=VIDEOS_PER_SECOND, time_period=1.0)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    _end_with_newline(progress_path)
+    with open(progress_path, "a", encoding="utf-8") as out, executor:
+        tasks = [fetch_and_record(executor, sem, limiter, out, vid) for vid in video_ids]
+        await tqdm.gather(*tasks, desc="Fetching transcripts", unit="video")
+
+
+def load_progress(path: str) -> Dict[str, str]:
+    """
+    Read the JSONL progress file into {video_id: transcript}; later lines win.
+
+    A line cut short by a crash mid-write is skipped, so the run can resume.
+    """
+    progress: Dict[str, str] = {}
+    if not os.path.exists(path):
+        return progress
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping malformed line {lineno} in {path}")
+                continue
+            progress[str(record["video_id"])] = record.get("transcript") or ""
+    return progress
+
+
+def _end_with_newline(path: str) -> None:
+    """Terminate a partial last line so new records start on a line of their own."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def compact_progress(path: str, progress: Dict[str, str]) -> None:
+    """Rewrite the progress file with one line per video (drops repeats and broken lines)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        for vid, text in progress.items():
+            out.write(json.dumps({"video_id": vid, "transcript": text}, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch transcripts for Core_video=1 rows.")
     parser.add_argument("--input", default="youtube_core.csv", help="Input CSV exported from Numbers")
     parser.add_argument("--output", default="youtube_core_transcripts.csv", help="Output CSV with transcripts")
+    parser.add_argument(
+        "--concurrency", type=int, default=CONCURRENCY, help="Max videos fetched concurrently"
+    )
+    parser.add_argument(
+        "--progress",
+        default=None,
+        help="JSONL file results are streamed to; rerunning resumes from it (default: <output>.jsonl)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Drop cached transcripts and refetch them")
     args = parser.parse_args()
 
+    progress_path = args.progress or os.path.splitext(args.output)[0] + ".jsonl"
+    if args.no_cache:
+        CACHE.evict("transcript")
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+
     df = load_core_csv(args.input)
     if "Core_video" not in df.columns:
         raise ValueError("Input CSV must contain a 'Core_video' column.")
     if "video_id" not in df.columns:
         raise ValueError("Input CSV must contain a 'video_id' column.")
 
-    core_df = df[df["Core_video"].astype(str) == "1"].copy()
+    # Arrow-backed strings hash faster than object columns for the video_id lookups below
+    df["video_id"] = df["video_id"].astype("string[pyarrow]")
+
+    # Only video_id is needed to drive fetches; other columns stay in df
+    mask = df["Core_video"].str.strip().eq("1")
+    core_df = df.loc[mask, ["video_id"]].copy()
     if core_df.empty:
         print("No rows with Core_video = 1 found.")
         return
 
-    transcripts = []
-    for vid in tqdm(core_df["video_id"], desc="Fetching transcripts", unit="video"):
-        transcripts.append(get_transcript(vid))
-
-    core_df["transcript"] = transcripts
+    # Resume: skip videos that already have a non-empty transcript in the progress file
+    core_ids = core_df["video_id"].dropna().unique().tolist()
+    done = {vid for vid, text in load_progress(progress_path).items() if text}
+    todo = [vid for vid in core_ids if vid not in done]
+    if done:
+        print(f"Resuming from {progress_path}: {len(core_ids) - len(todo)} of {len(core_ids)} already fetched.")
+    asyncio.run(fetch_transcripts(todo, progress_path, args.concurrency))
 
-    # Merge transcripts back to all rows (optional)
-    merged = df.merge(core_df[["video_id", "transcript"]], on="video_id", how="left")
+    # Attach transcripts to all rows by video_id (non-core rows stay empty)
+    fetched = load_progress(progress_path)
+    compact_progress(progress_path, fetched)
+    tr_map = {vid: fetched.get(vid, "") for vid in core_ids}
+    df["transcript"] = df["video_id"].map(tr_map)
 
-    merged.to_csv(args.output, index=False, encoding="utf-8-sig")
-    print(f"Saved with transcripts to {args.output}")
+    df.to_csv(args.output, index=False, encoding="utf-8-sig")
+    parquet_path = os.path.splitext(args.output)[0] + ".parquet"
+    df.to_parquet(parquet_path, index=False, compression="zstd")
+    print(f"Saved with transcripts to {args.output} and {parquet_path}")
 
 
 if __name__ == "__main__":
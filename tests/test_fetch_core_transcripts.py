@@ -0,0 +1,111 @@
+"""Tests for fetch_core_transcripts.py (run with `python -m pytest` from the repo root)."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from fetch_core_transcripts import read_numbers_csv_pyarrow
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def write_numbers_csv(path: Path, df: pd.DataFrame) -> None:
+    """Write df the way Numbers exports it: sheet name first, then ';'-separated rows."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Sheet 1\n")
+        df.to_csv(f, sep=";", index=False)
+
+
+def read_python_engine(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, sep=";", dtype=str, engine="python", skiprows=1)
+
+
+def test_pyarrow_read_matches_python_engine_on_sample(tmp_path):
+    sample = pd.read_csv(REPO / "youtube_core_transcripts.csv", dtype=str, keep_default_na=False)
+    path = tmp_path / "core.csv"
+    write_numbers_csv(path, sample)
+
+    pd.testing.assert_frame_equal(read_numbers_csv_pyarrow(path), read_python_engine(path))
+
+
+@pytest.mark.parametrize(
+    "value", ["00123", "1e5", "2025-09-10T20:37:31Z", "a;b\nc", "123.0"],
+)
+def test_pyarrow_read_keeps_values_verbatim(tmp_path, value):
+    df = pd.DataFrame({"video_id": ["abc", "def"], "Core_video": ["1", ""], "extra": [value, ""]})
+    path = tmp_path / "edge.csv"
+    write_numbers_csv(path, df)
+
+    arrow = read_numbers_csv_pyarrow(path)
+    pd.testing.assert_frame_equal(arrow, read_python_engine(path))
+    assert arrow.loc[0, "extra"] == value
+
+
+
+def test_pyarrow_read_handles_header_newlines_blanks_and_duplicates(tmp_path):
+    path = tmp_path / "headers.csv"
+    path.write_text('Sheet 1\nvideo_id;"multi\nline";;n;n\n00123;1e5;x;NA;"a\nb"\n', encoding="utf-8")
+
+    arrow = read_numbers_csv_pyarrow(path)
+    pd.testing.assert_frame_equal(arrow, read_python_engine(path))
+    assert list(arrow.columns) == ["video_id", "multi\nline", "Unnamed: 2", "n", "n.1"]
+
+
+def test_resume_skips_truncated_progress_line(tmp_path, monkeypatch):
+    import fetch_core_transcripts as fct
+
+    core = pd.DataFrame({"video_id": ["aa", "zz"], "Core_video": ["1", "1"]})
+    input_path = tmp_path / "core.csv"
+    write_numbers_csv(input_path, core)
+    output_path = tmp_path / "out.csv"
+    progress_path = tmp_path / "out.jsonl"
+    # A crash mid-write leaves the last record cut short
+    progress_path.write_text(
+        '{"video_id": "aa", "transcript": "hello"}\n{"video_id": "zz", "transc', encoding="utf-8"
+    )
+
+    fetched = []
+    monkeypatch.setattr(fct, "get_transcript", _fake_get_transcript(fetched))
+    monkeypatch.setattr(
+        "sys.argv", ["fetch_core_transcripts.py", "--input", str(input_path), "--output", str(output_path)]
+    )
+    fct.main()
+
+    assert fetched == ["zz"]
+    assert fct.load_progress(str(progress_path)) == {"aa": "hello", "zz": "text for zz"}
+    out = pd.read_csv(output_path, dtype=str)
+    assert out["transcript"].tolist() == ["hello", "text for zz"]
+
+
+def test_reruns_keep_one_progress_line_per_video(tmp_path, monkeypatch):
+    import fetch_core_transcripts as fct
+
+    core = pd.DataFrame({"video_id": ["aa", "zz"], "Core_video": ["1", "1"]})
+    input_path = tmp_path / "core.csv"
+    write_numbers_csv(input_path, core)
+    output_path = tmp_path / "out.csv"
+    progress_path = tmp_path / "out.jsonl"
+
+    async def no_transcript_for_zz(executor, sem, limiter, video_id):
+        return "" if video_id == "zz" else f"text for {video_id}"
+
+    monkeypatch.setattr(fct, "get_transcript", no_transcript_for_zz)
+    monkeypatch.setattr(
+        "sys.argv", ["fetch_core_transcripts.py", "--input", str(input_path), "--output", str(output_path)]
+    )
+    for _ in range(3):
+        fct.main()
+
+    lines = progress_path.read_text(encoding="utf-8").splitlines()
+    assert sorted(lines) == sorted(
+        ['{"video_id": "aa", "transcript": "text for aa"}', '{"video_id": "zz", "transcript": ""}']
+    )
+
+
+def _fake_get_transcript(fetched):
+    async def fake(executor, sem, limiter, video_id):
+        fetched.append(video_id)
+        return f"text for {video_id}"
+
+    return fake
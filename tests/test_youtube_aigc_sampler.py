@@ -0,0 +1,128 @@
+"""Tests for youtube_aigc_sampler.py (run with `python -m pytest` from the repo root)."""
+
+import pandas as pd
+
+import youtube_aigc_sampler as sampler
+
+
+def search_page(prefix, n, token=None):
+    page = {"items": [{"id": {"videoId": f"{prefix}{i}"}, "snippet": {}} for i in range(n)]}
+    if token:
+        page["nextPageToken"] = token
+    return page
+
+
+def stub_search_requests(monkeypatch, pages):
+    """Serve follow-up pages by token and record (page_size, page_token) per request."""
+    sent = []
+
+    def fake_search_request(youtube, query, max_results, page_token=None):
+        sent.append((max_results, page_token))
+        return page_token
+
+    monkeypatch.setattr(sampler, "search_request", fake_search_request)
+    monkeypatch.setattr(sampler, "execute_request", lambda token, cost=1: pages[token])
+    return sent
+
+
+def test_short_first_page_is_not_topped_up(monkeypatch):
+    sent = stub_search_requests(monkeypatch, {"p2": search_page("b", 3)})
+
+    rows = list(sampler.search_videos_for_query(None, "q", 40, first_page=search_page("a", 37, "p2")))
+
+    assert len(rows) == 37
+    assert sent == []
+
+
+def test_pagination_requests_at_most_ceil_pages(monkeypatch):
+    pages = {None: search_page("a", 47, "p2"), "p2": search_page("b", 50, "p3"), "p3": search_page("c", 50)}
+    sent = stub_search_requests(monkeypatch, pages)
+
+    rows = list(sampler.search_videos_for_query(None, "q", 70))
+
+    assert sent == [(50, None), (20, "p2")]
+    assert len(rows) == 70
+    assert rows[-1]["video_id"] == "b22"
+
+
+def search_item(video_id, title):
+    return {
+        "id": {"videoId": video_id},
+        "snippet": {"channelId": "c", "channelTitle": "C", "publishedAt": "2025-09-01T00:00:00Z", "title": title},
+    }
+
+
+def detail_row(video_id, title, description, publish_date):
+    return {
+        "video_id": video_id,
+        "view_count": 10,
+        "like_count": 2,
+        "comment_count": 1,
+        "full_title": title,
+        "full_description": description,
+        "publish_date_full": publish_date,
+    }
+
+
+def test_main_writes_deduped_rows_with_details(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.argv", ["youtube_aigc_sampler.py"])
+    monkeypatch.setattr(sampler, "QUERIES", ["q1", "q2"])
+    monkeypatch.setattr(sampler, "MAX_RESULTS_PER_QUERY", 60)
+    monkeypatch.setattr(sampler, "build_client", lambda: None)
+
+    first_pages = {
+        "q1": {"items": [search_item("v1", "a"), search_item("v2", "b")], "nextPageToken": "p2"},
+        "q2": {"items": [search_item("v2", "b from q2"), search_item("v4", "d")]},
+    }
+    monkeypatch.setattr(sampler, "search_all_queries", lambda youtube, queries, max_results: first_pages)
+    # q1's second page is fetched through the pagination generator
+    stub_search_requests(monkeypatch, {"p2": {"items": [search_item("v3", "c")]}})
+
+    requested = []
+
+    def fake_details(video_ids):
+        requested.extend(video_ids)
+        return pd.DataFrame([detail_row(v, f"full {v}", f"desc {v}", "2025-10-02T00:00:00Z") for v in video_ids])
+
+    monkeypatch.setattr(sampler, "fetch_video_details", fake_details)
+
+    sampler.main()
+
+    out = pd.read_csv(tmp_path / sampler.OUTPUT_CSV, dtype=str, encoding="utf-8-sig")
+    assert requested == ["v1", "v2", "v3", "v4"]
+    assert list(out.columns) == [
+        "video_id", "channel_id", "channel_title", "publish_date", "title", "description", "query",
+        "view_count", "like_count", "comment_count", "publish_date_dt", "month_bucket",
+    ]
+    assert out["video_id"].tolist() == ["v1", "v2", "v3", "v4"]
+    # First query wins for duplicates
+    assert out.loc[out["video_id"] == "v2", "query"].item() == "q1"
+    assert out["title"].tolist() == ["full v1", "full v2", "full v3", "full v4"]
+    assert out["month_bucket"].unique().tolist() == ["2025-10"]
+    assert (tmp_path / sampler.OUTPUT_PARQUET).exists()
+
+
+def test_prefer_full_details_matches_fillna_coalesce():
+    df = pd.DataFrame(
+        {
+            "video_id": ["a", "b", "c"],
+            "title": ["t1", "t2", None],
+            "description": ["d1", "d2", "d3"],
+            "publish_date": ["p1", "p2", "p3"],
+            "full_title": ["F1", None, ""],
+            "full_description": [None, "FD", None],
+            "publish_date_full": ["P1", None, None],
+        }
+    )
+    expected = df.copy()
+    for full_col, col in sampler.FULL_COLUMNS.items():
+        expected[col] = expected[full_col].fillna(expected[col])
+    expected = expected.drop(columns=list(sampler.FULL_COLUMNS))
+
+    result = sampler.prefer_full_details(df.copy())
+
+    pd.testing.assert_frame_equal(result, expected)
+    # Empty strings from the API still override; nulls fall back to the snippet
+    assert result["title"].tolist() == ["F1", "t2", ""]
+    assert result["description"].tolist() == ["d1", "FD", "d3"]
@@ -10,20 +10,37 @@ Steps:
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
+import argparse
+import itertools
+import math
 import os
+import sys
+import threading
+import time
 
+import diskcache
+import httplib2
 import pandas as pd
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import set_user_agent
+from limits import RateLimitItemPerSecond
+from limits.storage import MemoryStorage
+from limits.strategies import MovingWindowRateLimiter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 from tqdm import tqdm
 
 # --------------------------------------------------------------------------- #
 # Configuration
 # --------------------------------------------------------------------------- #
 
-# Replace with your key if needed. Recommended: set env var YOUTUBE_API_KEY.
-API_KEY = os.getenv("YOUTUBE_API_KEY", "YOUR_API_KEY_HERE")
+# Read from env var YOUTUBE_API_KEY; a comma-separated list is used round-robin, one key per client
+API_KEYS = [k.strip() for k in os.getenv("YOUTUBE_API_KEY", "").split(",") if k.strip()]
+_API_KEY_CYCLE = itertools.cycle(API_KEYS)
+_API_KEY_LOCK = threading.Lock()
 
 # Single-layer queries
 QUERIES = [
@@ -31,6 +48,9 @@ QUERIES = [
     "AI tools for content creators",
     "AI workflow for content creation",
 ]
+# Results kept per query, fetched in at most ceil(MAX_RESULTS_PER_QUERY / 50) pages (50 is the API maximum)
+MAX_RESULTS_PER_QUERY = 40
+SEARCH_PAGE_SIZE = 50
 
 
 def iso_date(y: int, m: int, d: int) -> str:
@@ -42,33 +62,112 @@ def iso_date(y: int, m: int, d: int) -> str:
 START_DATE = iso_date(2025, 8, 1)
 END_DATE = iso_date(2025, 11, 22)
 
+# CSV for manual review in Numbers; Parquet for fast re-reads in analysis
+OUTPUT_CSV = "youtube_candidates_basic.csv"
+OUTPUT_PARQUET = "youtube_candidates_basic.parquet"
+
+# Client-side cap on YouTube Data API requests
+RATE_LIMIT = RateLimitItemPerSecond(10)
+RATE_LIMITER = MovingWindowRateLimiter(MemoryStorage())
+# HTTP statuses worth retrying with exponential backoff
+RETRY_STATUSES = {429, 503}
+
+# Google APIs only gzip responses for clients whose User-Agent contains "gzip"
+USER_AGENT = "aigc-sampler/1.0 (gzip)"
+HTTP_CACHE_DIR = ".http_cache"
+HTTP_TIMEOUT = 30
+# Optional local copy of the discovery document (git-ignored); otherwise the copy
+# bundled with google-api-python-client is used. Neither needs a network call.
+DISCOVERY_DOC = "youtube-v3.json"
+
+# Partial-response masks: only the keys the parsers below read are sent back
+SEARCH_FIELDS = "nextPageToken,items(id/videoId,snippet(channelId,channelTitle,publishedAt,title,description))"
+VIDEOS_FIELDS = "items(id,snippet(title,description,publishedAt),statistics(viewCount,likeCount,commentCount))"
+
+# On-disk cache of videos.list responses; stats drift, so entries expire after a week
+CACHE = diskcache.Cache(".yt_cache")
+DETAILS_TTL = 7 * 24 * 3600
+
+# videos.list batches fetched in parallel, one API client per worker thread
+DETAIL_WORKERS = 6
+_THREAD_LOCAL = threading.local()
+
+# videos.list columns that override the truncated search snippet values
+FULL_COLUMNS = {"full_title": "title", "full_description": "description", "publish_date_full": "publish_date"}
+
 
 # --------------------------------------------------------------------------- #
 # API helpers
 # --------------------------------------------------------------------------- #
 
+def next_api_key() -> str:
+    """Return the next API key in rotation; exit with a clear message if none is set."""
+    if not API_KEYS:
+        sys.exit("Set YOUTUBE_API_KEY (one key, or several separated by commas).")
+    with _API_KEY_LOCK:
+        return next(_API_KEY_CYCLE)
+
+
 def build_client():
-    """Create a YouTube Data API client."""
-    return build("youtube", "v3", developerKey=API_KEY)
+    """
+    Create a YouTube Data API client.
+
+    The client reuses one keep-alive connection with gzip-encoded responses and
+    is built from a local discovery document instead of fetching it.
+    """
+    http = set_user_agent(httplib2.Http(cache=HTTP_CACHE_DIR, timeout=HTTP_TIMEOUT), USER_AGENT)
+    if os.path.exists(DISCOVERY_DOC):
+        with open(DISCOVERY_DOC, encoding="utf-8") as f:
+            return build_from_document(f.read(), developerKey=next_api_key(), http=http)
+    return build("youtube", "v3", developerKey=next_api_key(), http=http, static_discovery=True)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """True for rate-limit / temporarily-unavailable API errors."""
+    return isinstance(exc, HttpError) and exc.resp.status in RETRY_STATUSES
 
 
-def search_videos_for_query(youtube, query: str, max_results: int = 40) -> List[Dict[str, str]]:
+@retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=wait_exponential(multiplier=1, max=60),
+    stop=stop_after_attempt(5),
+    reraise=True,
+)
+def execute_request(request, cost: int = 1):
     """
-    Search one query across the whole time window.
+    Execute an API request under the client-side rate limit, retrying on 429/503.
 
-    Default order is relevance; change to "viewCount" to sort by views.
+    `cost` is the number of API calls the request carries (>1 for batch requests).
     """
-    request = youtube.search().list(
+    while not RATE_LIMITER.hit(RATE_LIMIT, "youtube", cost=cost):
+        time.sleep(0.05)
+    return request.execute()
+
+
+def search_request(
+    youtube, query: str, max_results: int = MAX_RESULTS_PER_QUERY, page_token: Optional[str] = None
+):
+    """
+    Build (but do not send) a search request for one page of one query across the whole time window.
+
+    Page size is capped at the API maximum of 50. Default order is relevance;
+    change to "viewCount" to sort by views.
+    """
+    return youtube.search().list(
         part="snippet",
         q=query,
         type="video",
-        maxResults=max_results,
+        maxResults=min(max_results, SEARCH_PAGE_SIZE),
+        pageToken=page_token,
         publishedAfter=START_DATE,
         publishedBefore=END_DATE,
         order="relevance",
+        fields=SEARCH_FIELDS,
     )
-    response = request.execute()
 
+
+def parse_search_response(response: Dict, query: str) -> List[Dict[str, str]]:
+    """Flatten search results into one row per video."""
     rows: List[Dict[str, str]] = []
     for item in response.get("items", []):
         snippet = item.get("snippet", {})
@@ -86,31 +185,131 @@ def search_videos_for_query(youtube, query: str, max_results: int = 40) -> List[
     return rows
 
 
-def fetch_video_details(youtube, video_ids: List[str]) -> pd.DataFrame:
-    """
-    Fetch full descriptions plus view/like/comment counts in batches of up to 50 IDs.
-    """
-    detail_rows: List[Dict[str, str]] = []
-    for i in tqdm(range(0, len(video_ids), 50), desc="Fetching details"):
-        batch = video_ids[i : i + 50]
-        request = youtube.videos().list(part="snippet,statistics", id=",".join(batch))
-        response = request.execute()
-        for item in response.get("items", []):
-            vid = item.get("id")
-            s = item.get("statistics", {})
-            snippet = item.get("snippet", {})
-            detail_rows.append(
-                {
-                    "video_id": vid,
-                    "view_count": int(s.get("viewCount", 0)),
-                    "like_count": int(s.get("likeCount", 0)),
-                    "comment_count": int(s.get("commentCount", 0)),
-                    "full_title": snippet.get("title", ""),
-                    "full_description": snippet.get("description", ""),
-                    "publish_date_full": snippet.get("publishedAt", ""),
-                }
-            )
-    return pd.DataFrame(detail_rows)
+def search_videos_for_query(
+    youtube, query: str, max_results: int = MAX_RESULTS_PER_QUERY, first_page: Optional[Dict] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield up to max_results rows for one query, following nextPageToken.
+
+    At most ceil(max_results / SEARCH_PAGE_SIZE) pages are requested; the API often
+    returns short pages, and a short page is accepted rather than paying another
+    100 quota units to top it up. Pass first_page to start from an already-fetched
+    response (e.g., from a batch call).
+    """
+    max_pages = math.ceil(max_results / SEARCH_PAGE_SIZE)
+    collected = 0
+    response = first_page
+    page_token: Optional[str] = None
+    for page in range(max_pages):
+        if response is None:
+            page_size = min(SEARCH_PAGE_SIZE, max_results - page * SEARCH_PAGE_SIZE)
+            response = execute_request(search_request(youtube, query, page_size, page_token))
+        rows = parse_search_response(response, query)[: max_results - collected]
+        yield from rows
+        collected += len(rows)
+        page_token = response.get("nextPageToken")
+        if not page_token or collected >= max_results:
+            break
+        response = None
+
+
+def search_all_queries(youtube, queries: List[str], max_results: int = MAX_RESULTS_PER_QUERY) -> Dict[str, Dict]:
+    """
+    Fetch the first results page of every query in as few batch HTTP calls as possible.
+
+    Each batch holds at most RATE_LIMIT.amount requests, since the rate limiter can
+    never admit a larger cost in one hit. Queries that fail inside the batch with a
+    retryable status are re-sent on their own.
+    """
+    responses: Dict[str, Dict] = {}
+    errors: Dict[str, HttpError] = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = exception
+        else:
+            responses[request_id] = response
+
+    chunk_size = RATE_LIMIT.amount
+    for i in range(0, len(queries), chunk_size):
+        chunk = queries[i : i + chunk_size]
+        batch = youtube.new_batch_http_request(callback=on_response)
+        for q in chunk:
+            batch.add(search_request(youtube, q, max_results), request_id=q)
+        execute_request(batch, cost=len(chunk))
+
+    for q, exc in errors.items():
+        if not _is_retryable(exc):
+            raise exc
+        responses[q] = execute_request(search_request(youtube, q, max_results))
+    return responses
+
+
+def _thread_client():
+    """Per-thread API client; discovery clients and httplib2.Http are not thread-safe."""
+    client = getattr(_THREAD_LOCAL, "youtube", None)
+    if client is None:
+        client = _THREAD_LOCAL.youtube = build_client()
+    return client
+
+
+def fetch_details_batch(video_ids: List[str]) -> List[Dict[str, str]]:
+    """
+    Fetch full descriptions plus view/like/comment counts for up to 50 IDs.
+
+    Responses are cached per batch of IDs for DETAILS_TTL seconds.
+    """
+    key = (tuple(video_ids), "videos")
+    response = CACHE.get(key)
+    if response is None:
+        request = _thread_client().videos().list(
+            part="snippet,statistics", id=",".join(video_ids), fields=VIDEOS_FIELDS
+        )
+        response = execute_request(request)
+        CACHE.set(key, response, expire=DETAILS_TTL, tag="videos")
+
+    rows: List[Dict[str, str]] = []
+    for item in response.get("items", []):
+        vid = item.get("id")
+        s = item.get("statistics", {})
+        snippet = item.get("snippet", {})
+        rows.append(
+            {
+                "video_id": vid,
+                "view_count": int(s.get("viewCount", 0)),
+                "like_count": int(s.get("likeCount", 0)),
+                "comment_count": int(s.get("commentCount", 0)),
+                "full_title": snippet.get("title", ""),
+                "full_description": snippet.get("description", ""),
+                "publish_date_full": snippet.get("publishedAt", ""),
+            }
+        )
+    return rows
+
+
+def fetch_video_details(video_ids: List[str], max_workers: int = DETAIL_WORKERS) -> pd.DataFrame:
+    """
+    Fetch details for all IDs in batches of 50, several batches in parallel.
+
+    Each worker thread uses its own client; the shared rate limiter still applies.
+    """
+    batches = [video_ids[i : i + 50] for i in range(0, len(video_ids), 50)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            tqdm(executor.map(fetch_details_batch, batches), total=len(batches), desc="Fetching details")
+        )
+    return pd.DataFrame([row for rows in results for row in rows])
+
+
+def prefer_full_details(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Overwrite snippet title/description/publish_date with the full_* detail values.
+
+    update() only copies non-null values, so rows without details keep the snippet.
+    """
+    full = df[list(FULL_COLUMNS)].rename(columns=FULL_COLUMNS)
+    df.update(full)
+    return df.drop(columns=list(FULL_COLUMNS))
 
 
 # --------------------------------------------------------------------------- #
@@ -118,19 +317,29 @@ def fetch_video_details(youtube, video_ids: List[str]) -> pd.DataFrame:
 # --------------------------------------------------------------------------- #
 
 def main():
+    parser = argparse.ArgumentParser(description="Collect YouTube candidates for manual screening.")
+    parser.add_argument("--no-cache", action="store_true", help="Drop cached video details and refetch them")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        CACHE.evict("videos")
+
     youtube = build_client()
 
-    # 1) Search each query
-    all_rows: List[Dict[str, str]] = []
-    for q in QUERIES:
-        print(f"Searching for query: {q}")
-        all_rows.extend(search_videos_for_query(youtube, q, max_results=40))
+    # 1) Search all queries (first pages in one batch call)
+    print(f"Searching {len(QUERIES)} queries: {', '.join(QUERIES)}")
+    first_pages = search_all_queries(youtube, QUERIES, max_results=MAX_RESULTS_PER_QUERY)
 
-    df = pd.DataFrame(all_rows)
-    print("Raw candidates (before dedupe):", df.shape[0])
+    # 2) Deduplicate across queries while collecting (first query wins)
+    seen: Dict[str, Dict[str, str]] = {}
+    raw_count = 0
+    for q in QUERIES:
+        for row in search_videos_for_query(youtube, q, MAX_RESULTS_PER_QUERY, first_page=first_pages[q]):
+            raw_count += 1
+            seen.setdefault(row["video_id"], row)
+    print("Raw candidates (before dedupe):", raw_count)
 
-    # 2) Deduplicate across queries
-    df = df.drop_duplicates(subset="video_id").reset_index(drop=True)
+    df = pd.DataFrame(list(seen.values()))
     print("After dedupe:", df.shape[0])
 
     if df.empty:
@@ -138,21 +347,25 @@ def main():
         return
 
     # 3) Fetch full descriptions and statistics
-    details_df = fetch_video_details(youtube, df["video_id"].tolist())
-    df = df.merge(details_df, on="video_id", how="left")
+    details_df = fetch_video_details(df["video_id"].tolist())
+    # Arrow-backed strings on both sides make the key hashing cheaper than object columns
+    for d in (df, details_df):
+        d["video_id"] = d["video_id"].astype("string[pyarrow]")
+    df = df.merge(details_df, on="video_id", how="left", validate="one_to_one")
 
     # Prefer full_description/full_title when available
-    df["description"] = df["full_description"].fillna(df["description"])
-    df["title"] = df["full_title"].fillna(df["title"])
-    df["publish_date"] = df["publish_date_full"].fillna(df["publish_date"])
-    df = df.drop(columns=["full_description", "full_title", "publish_date_full"], errors="ignore")
+    df = prefer_full_details(df)
 
     # 4) Add month bucket
-    df["month_bucket"] = df["publish_date"].str.slice(0, 7)
-
-    # 5) Save CSV for manual review
-    df.to_csv("youtube_candidates_basic.csv", index=False, encoding="utf-8-sig")
-    print("Saved to youtube_candidates_basic.csv")
+    # Parse once; the datetime column is reused for date-range filters in analysis
+    dt = pd.to_datetime(df["publish_date"], utc=True, errors="coerce", format="ISO8601")
+    df["publish_date_dt"] = dt
+    df["month_bucket"] = dt.dt.strftime("%Y-%m")
+
+    # 5) Save CSV for manual review (plus Parquet for analysis)
+    df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
+    df.to_parquet(OUTPUT_PARQUET, index=False, compression="zstd")
+    print(f"Saved to {OUTPUT_CSV} and {OUTPUT_PARQUET}")
 
 
 if __name__ == "__main__":